@@ -0,0 +1,65 @@
+import functools
+import hashlib
+import os
+from urllib.parse import urlencode
+import orjson
+from cachetools import TTLCache
+
+
+def ttl_cache(ttl: int, maxsize: int = 128):
+    """Cache results of an async method for `ttl` seconds.
+    
+    The key is built from the call arguments (excluding `self`).
+    Empty results (None) are not cached so failed requests are retried.
+    """
+    def decorator(func):
+        cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            if key in cache:
+                return cache[key]
+            
+            result = await func(self, *args, **kwargs)
+            if result is not None:
+                cache[key] = result
+            return result
+        
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+
+class ReplayCacheMiss(Exception):
+    """Raised in replay mode when a response is missing from the disk cache."""
+
+
+class DiskCache:
+    """Store TMDB responses as JSON files keyed by endpoint and params."""
+    
+    def __init__(self, directory: str):
+        self.directory = directory
+    
+    def _path(self, url: str, params: dict) -> str:
+        # API key is left out so cached responses can be shared between keys
+        query = urlencode(sorted((k, v) for k, v in params.items() if k != 'api_key'))
+        digest = hashlib.sha256(f"{url}?{query}".encode()).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
+    
+    def get(self, url: str, params: dict):
+        """Return the cached response or None."""
+        try:
+            with open(self._path(url, params), 'rb') as f:
+                return orjson.loads(f.read())
+        except FileNotFoundError:
+            return None
+    
+    def set(self, url: str, params: dict, data):
+        """Save a response to the cache."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(url, params)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(orjson.dumps(data))
+        os.replace(tmp_path, path)
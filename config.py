@@ -13,12 +13,26 @@ class Config:
     TMDB_BASE_URL = "https://api.themoviedb.org/3"
     TMDB_IMAGE_BASE_URL = "https://image.tmdb.org/t/p/w500"
     
+    # TMDB rate limit: requests per period (seconds)
+    TMDB_RATE_LIMIT = 40
+    TMDB_RATE_PERIOD = 10
+    
+    # TMDB disk cache for offline development: 'enabled', 'replay' or 'disabled'
+    TMDB_CACHE_MODE = os.getenv('TMDB_CACHE_MODE', 'disabled')
+    TMDB_CACHE_DIR = 'tmdb_cache'
+    
     # Database configuration
     DATABASE_NAME = 'movie_bot.db'
     
     # Bot settings
     MAX_HISTORY_ENTRIES = 10
+    HISTORY_PAGE_SIZE = 20
     MOVIES_PER_PAGE = 5
+    
+    # Cache settings (seconds)
+    GENRE_CACHE_TTL = 24 * 60 * 60
+    MOVIE_DETAILS_CACHE_TTL = 24 * 60 * 60
+    SEARCH_CACHE_TTL = 10 * 60
 
 # Validate required environment variables
 required_vars = ['BOT_TOKEN', 'TMDB_API_KEY']
@@ -1,27 +1,107 @@
+import asyncio
 import logging
-import requests
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+import time
+import unicodedata
+from types import MappingProxyType
+import httpx
+import orjson
+from peewee import prefetch
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, InputMediaPhoto
 from telegram.ext import (
     Application, CommandHandler, MessageHandler, CallbackQueryHandler,
     ContextTypes, filters
 )
 from datetime import datetime, timedelta
 import config
-from models import User, SearchHistory, MovieResult, UserMovieStatus, database
+from cache import ttl_cache, DiskCache, ReplayCacheMiss
+from models import User, SearchHistory, Movie, SearchMovie, UserMovieStatus, database, create_tables
+
+# Use uvloop as the event loop when available
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
 
 # Configure logging
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     level=logging.INFO
 )
+# httpx logs full request URLs at INFO, which include the TMDB API key and bot token
+logging.getLogger("httpx").setLevel(logging.WARNING)
 logger = logging.getLogger(__name__)
 
+# Errors that mean a TMDB request failed (including replay cache misses)
+TMDB_ERRORS = (httpx.HTTPError, orjson.JSONDecodeError, ReplayCacheMiss)
+
+# Movie message templates
+MOVIE_MESSAGE_TEMPLATE = (
+    "🎬 <b>{title}</b>\n"
+    "📝 Оригинальное название: {original_title}\n"
+    "📅 Год: {year}\n"
+    "⭐ Рейтинг: {vote_average}/10\n"
+    "🎭 Жанр: {genres}\n"
+    "🔞 Возрастной рейтинг: {adult}\n"
+)
+MOVIE_BUDGET_TEMPLATE = "💰 Бюджет: ${budget:,}\n"
+MOVIE_REVENUE_TEMPLATE = "💵 Сборы: ${revenue:,}\n"
+MOVIE_OVERVIEW_TEMPLATE = "\n📖 Описание:\n{overview}\n\n"
+
+# Russian names for search types
+SEARCH_TYPE_NAMES = MappingProxyType({
+    'title': 'По названию',
+    'rating': 'По рейтингу',
+    'budget_low': 'Низкобюджетные',
+    'budget_high': 'Высокобюджетные'
+})
+
+# Inline keyboard for detailed history view
+HISTORY_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📅 Показать за последние 7 дней", callback_data="history_7")],
+    [InlineKeyboardButton("📅 Показать за последние 30 дней", callback_data="history_30")],
+    [InlineKeyboardButton("🗑️ Очистить историю", callback_data="clear_history")]
+])
+
+def normalize_genre_name(name: str) -> str:
+    """Normalize genre name for lookup."""
+    return unicodedata.normalize('NFC', name).strip().lower()
+
 class MovieBot:
     def __init__(self):
         self.config = config.Config
-        self.app = Application.builder().token(self.config.BOT_TOKEN).build()
+        create_tables()
+        self.session = None
+        self.disk_cache = None
+        if self.config.TMDB_CACHE_MODE in ('enabled', 'replay'):
+            self.disk_cache = DiskCache(self.config.TMDB_CACHE_DIR)
+        elif self.config.TMDB_CACHE_MODE != 'disabled':
+            logger.warning(f"Unknown TMDB_CACHE_MODE '{self.config.TMDB_CACHE_MODE}', disk cache is disabled")
+        self._genre_exact = None
+        self._genre_prefix = []
+        self._genre_cache_ts = 0
+        self._tokens = self.config.TMDB_RATE_LIMIT
+        self._tokens_ts = time.monotonic()
+        self._rate = self.config.TMDB_RATE_LIMIT / self.config.TMDB_RATE_PERIOD
+        self._rate_lock = asyncio.Lock()
+        self._inflight = {}
+        self.app = (Application.builder()
+                    .token(self.config.BOT_TOKEN)
+                    .post_init(self.on_startup)
+                    .post_shutdown(self.on_shutdown)
+                    .build())
         self.setup_handlers()
 
+    async def on_startup(self, app: Application):
+        """Open the shared HTTP/2 client for TMDB requests."""
+        limits = httpx.Limits(max_keepalive_connections=10, max_connections=20, keepalive_expiry=60)
+        self.session = httpx.AsyncClient(http2=True, limits=limits, timeout=10)
+
+    async def on_shutdown(self, app: Application):
+        """Close the shared HTTP client."""
+        if self.session:
+            await self.session.aclose()
+
     def setup_handlers(self):
         # Command handlers
         self.app.add_handler(CommandHandler("start", self.start))
@@ -40,7 +120,8 @@ class MovieBot:
 
     async def get_or_create_user(self, update: Update):
         user_data = update.effective_user
-        user, created = User.get_or_create(
+        user, created = await asyncio.to_thread(
+            User.get_or_create,
             telegram_id=user_data.id,
             defaults={
                 'username': user_data.username,
@@ -86,6 +167,63 @@ class MovieBot:
         )
         await update.message.reply_text(help_text)
 
+    async def _acquire(self):
+        """Wait for a token so requests stay under the TMDB rate limit."""
+        async with self._rate_lock:
+            now = time.monotonic()
+            self._tokens = min(self.config.TMDB_RATE_LIMIT,
+                               self._tokens + (now - self._tokens_ts) * self._rate)
+            self._tokens_ts = now
+            
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+                self._tokens = 1
+                self._tokens_ts = time.monotonic()
+            
+            self._tokens -= 1
+
+    async def fetch_json(self, url: str, params: dict):
+        """Perform a GET request to TMDB and return the decoded JSON.
+        
+        Identical requests already in flight share a single network call.
+        """
+        key = (url, tuple(sorted(params.items())))
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._request_json(url, params))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish_inflight(key, t))
+        return await asyncio.shield(task)
+
+    def _finish_inflight(self, key: tuple, task: asyncio.Task):
+        """Forget a finished request, retrieving its exception if nobody awaited it."""
+        self._inflight.pop(key, None)
+        if not task.cancelled():
+            task.exception()
+
+    async def _request_json(self, url: str, params: dict):
+        """Send a rate-limited GET request to TMDB.
+        
+        Depending on TMDB_CACHE_MODE, responses are read from and written to
+        the disk cache; in replay mode a cache miss raises ReplayCacheMiss.
+        """
+        if self.disk_cache:
+            data = await asyncio.to_thread(self.disk_cache.get, url, params)
+            if data is not None:
+                return data
+            if self.config.TMDB_CACHE_MODE == 'replay':
+                raise ReplayCacheMiss(f"No cached TMDB response for {url}")
+        
+        await self._acquire()
+        response = await self.session.get(url, params=params)
+        response.raise_for_status()
+        data = orjson.loads(response.content)
+        
+        if self.disk_cache:
+            await asyncio.to_thread(self.disk_cache.set, url, params, data)
+        return data
+
+    @ttl_cache(ttl=config.Config.SEARCH_CACHE_TTL, maxsize=512)
     async def search_movies_by_title(self, query: str, page: int = 1):
         """Search movies by title using TMDB API."""
         url = f"{self.config.TMDB_BASE_URL}/search/movie"
@@ -97,15 +235,20 @@ class MovieBot:
         }
         
         try:
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
+            return await self.fetch_json(url, params)
+        except TMDB_ERRORS as e:
             logger.error(f"Error searching movies: {e}")
             return None
 
     async def search_movies_by_rating(self, min_rating: float, genre: str = None, page: int = 1):
         """Search movies by rating with optional genre filter."""
+        # Resolve genre before the cache so results are keyed by genre ID
+        genre_id = await self.get_genre_id(genre) if genre else None
+        return await self._search_movies_by_rating(min_rating, genre_id, page)
+
+    @ttl_cache(ttl=config.Config.SEARCH_CACHE_TTL, maxsize=512)
+    async def _search_movies_by_rating(self, min_rating: float, genre_id: int = None, page: int = 1):
+        """Discover movies by rating, optionally filtered by genre ID."""
         url = f"{self.config.TMDB_BASE_URL}/discover/movie"
         params = {
             'api_key': self.config.TMDB_API_KEY,
@@ -116,22 +259,24 @@ class MovieBot:
             'language': 'ru-RU'
         }
         
-        if genre:
-            # Get genre ID from name
-            genre_id = await self.get_genre_id(genre)
-            if genre_id:
-                params['with_genres'] = genre_id
+        if genre_id:
+            params['with_genres'] = genre_id
         
         try:
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
+            return await self.fetch_json(url, params)
+        except TMDB_ERRORS as e:
             logger.error(f"Error searching movies by rating: {e}")
             return None
 
     async def search_movies_by_budget(self, budget_type: str, genre: str = None, page: int = 1):
         """Search movies by budget (low or high)."""
+        # Resolve genre before the cache so results are keyed by genre ID
+        genre_id = await self.get_genre_id(genre) if genre else None
+        return await self._search_movies_by_budget(budget_type, genre_id, page)
+
+    @ttl_cache(ttl=config.Config.SEARCH_CACHE_TTL, maxsize=512)
+    async def _search_movies_by_budget(self, budget_type: str, genre_id: int = None, page: int = 1):
+        """Discover movies by budget, optionally filtered by genre ID."""
         url = f"{self.config.TMDB_BASE_URL}/discover/movie"
         
         if budget_type == 'low':
@@ -147,39 +292,48 @@ class MovieBot:
             'language': 'ru-RU'
         }
         
-        if genre:
-            genre_id = await self.get_genre_id(genre)
-            if genre_id:
-                params['with_genres'] = genre_id
+        if genre_id:
+            params['with_genres'] = genre_id
         
         try:
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
+            return await self.fetch_json(url, params)
+        except TMDB_ERRORS as e:
             logger.error(f"Error searching movies by budget: {e}")
             return None
 
     async def get_genre_id(self, genre_name: str):
         """Get genre ID from genre name."""
-        url = f"{self.config.TMDB_BASE_URL}/genre/movie/list"
-        params = {
-            'api_key': self.config.TMDB_API_KEY,
-            'language': 'ru-RU'
-        }
-        
-        try:
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            genres = response.json().get('genres', [])
+        if self._genre_exact is None or time.monotonic() - self._genre_cache_ts >= self.config.GENRE_CACHE_TTL:
+            url = f"{self.config.TMDB_BASE_URL}/genre/movie/list"
+            params = {
+                'api_key': self.config.TMDB_API_KEY,
+                'language': 'ru-RU'
+            }
             
-            for genre in genres:
-                if genre_name.lower() in genre['name'].lower():
-                    return genre['id']
-            return None
-        except requests.RequestException:
-            return None
+            try:
+                data = await self.fetch_json(url, params)
+            except TMDB_ERRORS as e:
+                logger.error(f"Error getting genre list: {e}")
+                return None
+            
+            self._genre_exact = {
+                normalize_genre_name(genre['name']): genre['id']
+                for genre in data.get('genres', [])
+            }
+            self._genre_prefix = sorted(self._genre_exact.items())
+            self._genre_cache_ts = time.monotonic()
+        
+        name = normalize_genre_name(genre_name)
+        if name in self._genre_exact:
+            return self._genre_exact[name]
+        
+        # Fall back to prefix match, e.g. "фантаст" -> "фантастика"
+        for genre, genre_id in self._genre_prefix:
+            if genre.startswith(name):
+                return genre_id
+        return None
 
+    @ttl_cache(ttl=config.Config.MOVIE_DETAILS_CACHE_TTL, maxsize=2048)
     async def get_movie_details(self, movie_id: int):
         """Get detailed information about a movie."""
         url = f"{self.config.TMDB_BASE_URL}/movie/{movie_id}"
@@ -189,10 +343,8 @@ class MovieBot:
         }
         
         try:
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
+            return await self.fetch_json(url, params)
+        except TMDB_ERRORS as e:
             logger.error(f"Error getting movie details: {e}")
             return None
 
@@ -203,31 +355,58 @@ class MovieBot:
         release_date = movie_data.get('release_date', 'Неизвестно')
         vote_average = movie_data.get('vote_average', 0)
         overview = movie_data.get('overview', 'Описание отсутствует.')
-        genres = ', '.join([genre['name'] for genre in movie_data.get('genres', [])])
+        genres = ', '.join(genre['name'] for genre in movie_data.get('genres') or ())
         adult = "🔞 18+" if movie_data.get('adult') else "👨‍👩‍👧‍👦 Для всех"
         budget = movie_data.get('budget', 0)
         revenue = movie_data.get('revenue', 0)
         
-        message = (
-            f"🎬 <b>{title}</b>\n"
-            f"📝 Оригинальное название: {original_title}\n"
-            f"📅 Год: {release_date[:4] if release_date else 'Неизвестно'}\n"
-            f"⭐ Рейтинг: {vote_average}/10\n"
-            f"🎭 Жанр: {genres or 'Неизвестно'}\n"
-            f"🔞 Возрастной рейтинг: {adult}\n"
+        message = MOVIE_MESSAGE_TEMPLATE.format(
+            title=title,
+            original_title=original_title,
+            year=release_date[:4] if release_date else 'Неизвестно',
+            vote_average=vote_average,
+            genres=genres or 'Неизвестно',
+            adult=adult
         )
         
         if budget > 0:
-            message += f"💰 Бюджет: ${budget:,}\n"
+            message += MOVIE_BUDGET_TEMPLATE.format(budget=budget)
         if revenue > 0:
-            message += f"💵 Сборы: ${revenue:,}\n"
+            message += MOVIE_REVENUE_TEMPLATE.format(revenue=revenue)
         
-        message += f"\n📖 Описание:\n{overview}\n\n"
+        message += MOVIE_OVERVIEW_TEMPLATE.format(overview=overview)
         
         return message
 
+    async def send_movies(self, update: Update, movies: list):
+        """Send movie results, grouping those with posters into one album."""
+        media = []
+        for movie in movies:
+            message = await self.format_movie_message(movie)
+            poster_path = movie.get('poster_path')
+            
+            if poster_path:
+                poster_url = f"{self.config.TMDB_IMAGE_BASE_URL}{poster_path}"
+                media.append(InputMediaPhoto(media=poster_url, caption=message, parse_mode='HTML'))
+            else:
+                await update.message.reply_text(message, parse_mode='HTML')
+        
+        # Telegram albums require at least two items
+        if len(media) > 1:
+            await update.message.reply_media_group(media=media)
+        elif media:
+            await update.message.reply_photo(
+                photo=media[0].media,
+                caption=media[0].caption,
+                parse_mode='HTML'
+            )
+
     async def save_search_history(self, user: User, search_type: str, query: str, results: list):
         """Save search results to database."""
+        await asyncio.to_thread(self._save_search_history_sync, user, search_type, query, results)
+
+    def _save_search_history_sync(self, user: User, search_type: str, query: str, results: list):
+        """Write search results to database (runs in a worker thread)."""
         with database.atomic():
             search = SearchHistory.create(
                 user=user,
@@ -236,22 +415,30 @@ class MovieBot:
                 result_count=len(results)
             )
             
+            movie_rows = []
             for movie_data in results:
-                MovieResult.create(
-                    search=search,
-                    movie_id=movie_data.get('id'),
-                    title=movie_data.get('title', ''),
-                    original_title=movie_data.get('original_title', ''),
-                    overview=movie_data.get('overview', ''),
-                    release_date=movie_data.get('release_date', ''),
-                    vote_average=movie_data.get('vote_average', 0),
-                    vote_count=movie_data.get('vote_count', 0),
-                    genre_names=', '.join([genre['name'] for genre in movie_data.get('genres', [])]),
-                    adult=movie_data.get('adult', False),
-                    poster_path=movie_data.get('poster_path', ''),
-                    budget=movie_data.get('budget', 0),
-                    revenue=movie_data.get('revenue', 0)
-                )
+                genre_names = ', '.join(genre['name'] for genre in movie_data.get('genres', []))
+                movie_rows.append({
+                    'movie_id': movie_data.get('id'),
+                    'title': movie_data.get('title', ''),
+                    'original_title': movie_data.get('original_title', ''),
+                    'overview': movie_data.get('overview', ''),
+                    'release_date': movie_data.get('release_date', ''),
+                    'vote_average': movie_data.get('vote_average', 0),
+                    'vote_count': movie_data.get('vote_count', 0),
+                    'genre_names': genre_names,
+                    'adult': movie_data.get('adult', False),
+                    'poster_path': movie_data.get('poster_path', ''),
+                    'budget': movie_data.get('budget', 0),
+                    'revenue': movie_data.get('revenue', 0)
+                })
+            
+            if movie_rows:
+                # Movie metadata is stored once and shared between searches
+                Movie.insert_many(movie_rows).on_conflict_ignore().execute()
+                SearchMovie.insert_many([
+                    {'search': search, 'movie': row['movie_id']} for row in movie_rows
+                ]).execute()
 
     async def movie_search_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle movie search command."""
@@ -276,29 +463,17 @@ class MovieBot:
         movies = results['results'][:self.config.MOVIES_PER_PAGE]
         
         # Get detailed information for each movie
-        detailed_movies = []
-        for movie in movies:
-            details = await self.get_movie_details(movie['id'])
-            if details:
-                detailed_movies.append(details)
+        details_list = await asyncio.gather(
+            *(self.get_movie_details(movie['id']) for movie in movies),
+            return_exceptions=True
+        )
+        detailed_movies = [details for details in details_list if isinstance(details, dict)]
         
         # Save to history
         await self.save_search_history(user, 'title', query, detailed_movies)
         
         # Send results
-        for movie in detailed_movies:
-            message = await self.format_movie_message(movie)
-            poster_path = movie.get('poster_path')
-            
-            if poster_path:
-                poster_url = f"{self.config.TMDB_IMAGE_BASE_URL}{poster_path}"
-                await update.message.reply_photo(
-                    photo=poster_url,
-                    caption=message,
-                    parse_mode='HTML'
-                )
-            else:
-                await update.message.reply_text(message, parse_mode='HTML')
+        await self.send_movies(update, detailed_movies)
 
     async def movie_by_rating_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle movie search by rating command."""
@@ -332,27 +507,15 @@ class MovieBot:
         movies = results['results'][:self.config.MOVIES_PER_PAGE]
         
         # Get detailed information
-        detailed_movies = []
-        for movie in movies:
-            details = await self.get_movie_details(movie['id'])
-            if details:
-                detailed_movies.append(details)
+        details_list = await asyncio.gather(
+            *(self.get_movie_details(movie['id']) for movie in movies),
+            return_exceptions=True
+        )
+        detailed_movies = [details for details in details_list if isinstance(details, dict)]
         
         await self.save_search_history(user, 'rating', f"rating>{min_rating}{f' genre:{genre}' if genre else ''}", detailed_movies)
         
-        for movie in detailed_movies:
-            message = await self.format_movie_message(movie)
-            poster_path = movie.get('poster_path')
-            
-            if poster_path:
-                poster_url = f"{self.config.TMDB_IMAGE_BASE_URL}{poster_path}"
-                await update.message.reply_photo(
-                    photo=poster_url,
-                    caption=message,
-                    parse_mode='HTML'
-                )
-            else:
-                await update.message.reply_text(message, parse_mode='HTML')
+        await self.send_movies(update, detailed_movies)
 
     async def low_budget_movie_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle low budget movie search command."""
@@ -383,28 +546,16 @@ class MovieBot:
         movies = results['results'][:self.config.MOVIES_PER_PAGE]
         
         # Get detailed information
-        detailed_movies = []
-        for movie in movies:
-            details = await self.get_movie_details(movie['id'])
-            if details:
-                detailed_movies.append(details)
+        details_list = await asyncio.gather(
+            *(self.get_movie_details(movie['id']) for movie in movies),
+            return_exceptions=True
+        )
+        detailed_movies = [details for details in details_list if isinstance(details, dict)]
         
         search_query = f"budget:{budget_type}{f' genre:{genre}' if genre else ''}"
         await self.save_search_history(user, f'budget_{budget_type}', search_query, detailed_movies)
         
-        for movie in detailed_movies:
-            message = await self.format_movie_message(movie)
-            poster_path = movie.get('poster_path')
-            
-            if poster_path:
-                poster_url = f"{self.config.TMDB_IMAGE_BASE_URL}{poster_path}"
-                await update.message.reply_photo(
-                    photo=poster_url,
-                    caption=message,
-                    parse_mode='HTML'
-                )
-            else:
-                await update.message.reply_text(message, parse_mode='HTML')
+        await self.send_movies(update, detailed_movies)
 
     async def history(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Show search history."""
@@ -416,6 +567,7 @@ class MovieBot:
                    .where(SearchHistory.user == user)
                    .order_by(SearchHistory.created_at.desc())
                    .limit(self.config.MAX_HISTORY_ENTRIES))
+        searches = await asyncio.to_thread(list, searches)
         
         if not searches:
             await update.message.reply_text("📋 История поиска пуста.")
@@ -431,25 +583,11 @@ class MovieBot:
                 f"   <b>Найдено:</b> {search.result_count} фильмов\n\n"
             )
         
-        # Add inline keyboard for detailed history view
-        keyboard = [
-            [InlineKeyboardButton("📅 Показать за последние 7 дней", callback_data="history_7")],
-            [InlineKeyboardButton("📅 Показать за последние 30 дней", callback_data="history_30")],
-            [InlineKeyboardButton("🗑️ Очистить историю", callback_data="clear_history")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await update.message.reply_text(message, parse_mode='HTML', reply_markup=reply_markup)
+        await update.message.reply_text(message, parse_mode='HTML', reply_markup=HISTORY_KEYBOARD)
 
     def get_search_type_name(self, search_type: str) -> str:
         """Get Russian name for search type."""
-        types = {
-            'title': 'По названию',
-            'rating': 'По рейтингу',
-            'budget_low': 'Низкобюджетные',
-            'budget_high': 'Высокобюджетные'
-        }
-        return types.get(search_type, search_type)
+        return SEARCH_TYPE_NAMES.get(search_type, search_type)
 
     async def handle_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle inline keyboard callbacks."""
@@ -457,21 +595,36 @@ class MovieBot:
         await query.answer()
         
         if query.data.startswith('history_'):
-            days = int(query.data.split('_')[1])
-            await self.show_detailed_history(query, days)
+            parts = query.data.split('_', 2)
+            days = int(parts[1])
+            before = datetime.fromisoformat(parts[2]) if len(parts) > 2 else None
+            await self.show_detailed_history(query, days, before)
         elif query.data == 'clear_history':
             await self.clear_history(query)
 
-    async def show_detailed_history(self, query, days: int):
-        """Show detailed history for specific period."""
-        user = User.get(telegram_id=query.from_user.id)
+    async def show_detailed_history(self, query, days: int, before: datetime = None):
+        """Show detailed history for specific period.
+        
+        Results are paginated by creation date: `before` is the date of the
+        last entry on the previous page.
+        """
+        user = await asyncio.to_thread(User.get, telegram_id=query.from_user.id)
         cutoff_date = datetime.now() - timedelta(days=days)
+        page_size = self.config.HISTORY_PAGE_SIZE
+        
+        condition = (SearchHistory.user == user) & (SearchHistory.created_at >= cutoff_date)
+        if before:
+            condition &= SearchHistory.created_at < before
         
         searches = (SearchHistory
                    .select()
-                   .where((SearchHistory.user == user) & 
-                          (SearchHistory.created_at >= cutoff_date))
-                   .order_by(SearchHistory.created_at.desc()))
+                   .where(condition)
+                   .order_by(SearchHistory.created_at.desc())
+                   .limit(page_size + 1))
+        # Load movie results for all searches in one query instead of per search
+        searches = await asyncio.to_thread(prefetch, searches, SearchMovie, Movie)
+        has_more = len(searches) > page_size
+        searches = searches[:page_size]
         
         if not searches:
             await query.edit_message_text("📋 История поиска за выбранный период пуста.")
@@ -487,17 +640,24 @@ class MovieBot:
                 f"   <b>Результатов:</b> {search.result_count}\n\n"
             )
         
-        await query.edit_message_text(message, parse_mode='HTML')
+        reply_markup = None
+        if has_more:
+            cursor = searches[-1].created_at.isoformat()
+            reply_markup = InlineKeyboardMarkup([
+                [InlineKeyboardButton("➡️ Далее", callback_data=f"history_{days}_{cursor}")]
+            ])
+        
+        await query.edit_message_text(message, parse_mode='HTML', reply_markup=reply_markup)
 
     async def clear_history(self, query):
         """Clear user's search history."""
-        user = User.get(telegram_id=query.from_user.id)
+        user = await asyncio.to_thread(User.get, telegram_id=query.from_user.id)
         
         # Delete all user's search history
-        deleted_count = (SearchHistory
+        delete_query = (SearchHistory
                         .delete()
-                        .where(SearchHistory.user == user)
-                        .execute())
+                        .where(SearchHistory.user == user))
+        deleted_count = await asyncio.to_thread(delete_query.execute)
         
         await query.edit_message_text(f"🗑️ Удалено записей истории: {deleted_count}")
 
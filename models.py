@@ -3,7 +3,13 @@ from datetime import datetime
 import config
 
 # Initialize database
-database = SqliteDatabase(config.Config.DATABASE_NAME)
+database = SqliteDatabase(config.Config.DATABASE_NAME, pragmas={
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'cache_size': -64000,  # 64MB
+    'temp_store': 'memory',
+    'mmap_size': 268435456  # 256MB
+})
 
 class BaseModel(Model):
     class Meta:
@@ -23,9 +29,13 @@ class SearchHistory(BaseModel):
     result_count = IntegerField()
     created_at = DateTimeField(default=datetime.now)
 
-class MovieResult(BaseModel):
-    search = ForeignKeyField(SearchHistory, backref='movies')
-    movie_id = IntegerField()
+    class Meta:
+        indexes = (
+            (('user', 'created_at'), False),
+        )
+
+class Movie(BaseModel):
+    movie_id = IntegerField(primary_key=True)  # TMDB movie ID
     title = CharField()
     original_title = CharField(null=True)
     overview = TextField(null=True)
@@ -38,9 +48,13 @@ class MovieResult(BaseModel):
     budget = BigIntegerField(null=True)
     revenue = BigIntegerField(null=True)
 
+class SearchMovie(BaseModel):
+    search = ForeignKeyField(SearchHistory, backref='movies')
+    movie = ForeignKeyField(Movie, backref='searches')
+
 class UserMovieStatus(BaseModel):
     user = ForeignKeyField(User, backref='movie_statuses')
-    movie = ForeignKeyField(MovieResult, backref='user_statuses')
+    movie = ForeignKeyField(Movie, backref='user_statuses')
     watched = BooleanField(default=False)
     created_at = DateTimeField(default=datetime.now)
     updated_at = DateTimeField(default=datetime.now)
@@ -51,9 +65,7 @@ def create_tables():
         database.create_tables([
             User, 
             SearchHistory, 
-            MovieResult, 
+            Movie, 
+            SearchMovie, 
             UserMovieStatus
         ])
-
-# Initialize database
-create_tables()